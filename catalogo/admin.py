@@ -1,18 +1,145 @@
 # catalogo/admin.py
-from django.contrib import admin
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import BooleanField, Case, Count, Value, When
+from django import forms
+from django.utils.functional import cached_property
+from .eventi import evento_maglia_nascosta, evento_maglia_pubblicata, pubblica_dopo_commit
 from .models import Maglia
 
+# I parametri della modalità "scalabile" del pannello admin (ADMIN_*) sono definiti in
+# settings.py e letti a ogni uso, così override_settings ha effetto
+
+
+# --------------------------
+# Paginazione con conteggio stimato
+# --------------------------
+class PaginatorStimato(Paginator):
+    """
+    Su PostgreSQL, per la lista non filtrata, usa la stima delle righe della tabella
+    (pg_class.reltuples) al posto di un COUNT(*) completo. Con filtri o ricerca attivi
+    la stima del planner è troppo imprecisa, quindi il conteggio resta esatto; lo stesso
+    sotto la soglia configurata o su altri database.
+    """
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                riga = cursor.fetchone()
+            # reltuples vale -1 se la tabella non è mai stata analizzata
+            stima = riga[0] if riga else -1
+            if stima >= settings.ADMIN_SOGLIA_CONTEGGIO_STIMATO:
+                return stima
+        return super().count
+
+
+# --------------------------
+# Filtri laterali con valori in cache
+# --------------------------
+class FiltroValoriInCache(admin.SimpleListFilter):
+    """
+    Filtro che mostra solo i valori più frequenti di un campo, calcolati una volta
+    e tenuti in cache, invece di eseguire un DISTINCT su tutta la tabella a ogni caricamento.
+    """
+    campo = None
+
+    def lookups(self, request, model_admin):
+        chiave = f'admin:maglia:filtro:{self.campo}'
+        valori = cache.get(chiave)
+        if valori is None:
+            valori = list(
+                Maglia.objects.values(self.campo)
+                .annotate(conteggio=Count('pk'))
+                .order_by('-conteggio')
+                .values_list(self.campo, flat=True)[:settings.ADMIN_FILTRI_MAX_VALORI]
+            )
+            cache.set(chiave, valori, settings.ADMIN_FILTRI_CACHE_TIMEOUT)
+        return [(valore, valore) for valore in sorted(valori)]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.campo: self.value()})
+        return queryset
+
+
+class FiltroSquadra(FiltroValoriInCache):
+    title = 'Squadra'
+    parameter_name = 'squadra'
+    campo = 'squadra'
+
+
+class FiltroStagione(FiltroValoriInCache):
+    title = 'Stagione/Anno'
+    parameter_name = 'anno_stagione'
+    campo = 'anno_stagione'
+
+
+# --------------------------
+# Azioni massive a lotti
+# --------------------------
+class MagliaActionForm(ActionForm):
+    # Campo extra accanto al menu delle azioni, usato da "Riassegna proprietario"
+    nuovo_utente = forms.CharField(
+        required=False,
+        label="Nuovo proprietario (username)",
+    )
+
+
+def pk_a_lotti(queryset, dimensione=None):
+    """
+    Restituisce le chiavi primarie del queryset a blocchi, con paginazione per chiave
+    (pk > ultimo visto), senza caricare in memoria gli oggetti selezionati.
+    Le righe già restituite non vengono rilette anche se l'aggiornamento del lotto
+    le fa uscire (o rientrare) dal filtro del queryset.
+    """
+    dimensione = dimensione or settings.ADMIN_DIMENSIONE_LOTTO
+    queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    ultimo = None
+    while True:
+        blocco = queryset if ultimo is None else queryset.filter(pk__gt=ultimo)
+        lotto = list(blocco[:dimensione])
+        if not lotto:
+            return
+        yield lotto
+        ultimo = lotto[-1]
+
+
 # 1. Definiamo come vogliamo che la Maglia appaia nel pannello admin (Opzionale, ma consigliato)
 class MagliaAdmin(admin.ModelAdmin):
     # Mostra queste colonne nella lista delle maglie
     list_display = ('giocatore', 'squadra', 'anno_stagione', 'utente', 'valore_stimato', 'visibile_in_vetrina')
-    
-    # Filtri laterali per trovare rapidamente le maglie
-    list_filter = ('squadra', 'anno_stagione', 'visibile_in_vetrina')
-    
+
+    # Carica l'utente con una JOIN invece di una query per riga
+    list_select_related = ('utente',)
+
+    # Filtri laterali per trovare rapidamente le maglie (valori limitati e in cache)
+    list_filter = (FiltroSquadra, FiltroStagione, 'visibile_in_vetrina')
+
     # Campo di ricerca
     search_fields = ('giocatore', 'squadra', 'note_personali')
-    
+
+    # Evita il secondo COUNT(*) sull'intera tabella e usa il conteggio stimato su PostgreSQL
+    show_full_result_count = False
+    paginator = PaginatorStimato
+
+    # Selezione del proprietario con ricerca invece di una <select> con tutti gli utenti
+    autocomplete_fields = ('utente',)
+
+    # Azioni massive eseguite a lotti
+    action_form = MagliaActionForm
+    actions = ('inverti_visibilita_vetrina', 'riassegna_proprietario')
+
     # Suddividi i campi in gruppi per maggiore leggibilità nella pagina di modifica
     fieldsets = (
         ('Informazioni Base', {
@@ -27,5 +154,48 @@ class MagliaAdmin(admin.ModelAdmin):
         })
     )
 
+    @admin.action(description="Inverti visibilità in vetrina delle maglie selezionate")
+    def inverti_visibilita_vetrina(self, request, queryset):
+        aggiornate = 0
+        for lotto in pk_a_lotti(queryset):
+            with transaction.atomic():
+                # update() non invia segnali: gli eventi per la vetrina live si pubblicano
+                # qui, un gruppo per lotto, dopo il commit
+                erano_visibili = list(
+                    Maglia.objects.select_for_update()
+                    .filter(pk__in=lotto, visibile_in_vetrina=True)
+                    .values_list('pk', flat=True)
+                )
+                aggiornate += Maglia.objects.filter(pk__in=lotto).update(
+                    visibile_in_vetrina=Case(
+                        When(visibile_in_vetrina=True, then=Value(False)),
+                        default=Value(True),
+                        output_field=BooleanField(),
+                    )
+                )
+                pubblicate = Maglia.objects.filter(pk__in=lotto, visibile_in_vetrina=True).select_related('utente')
+                pubblica_dopo_commit(
+                    [evento_maglia_nascosta(Maglia(pk=pk)) for pk in erano_visibili]
+                    + [evento_maglia_pubblicata(maglia) for maglia in pubblicate]
+                )
+        self.message_user(request, f"Visibilità invertita per {aggiornate} maglie.", messages.SUCCESS)
+
+    @admin.action(description="Riassegna le maglie selezionate al nuovo proprietario")
+    def riassegna_proprietario(self, request, queryset):
+        username = request.POST.get('nuovo_utente', '').strip()
+        if not username:
+            self.message_user(request, "Indica lo username del nuovo proprietario.", messages.ERROR)
+            return
+        try:
+            nuovo_utente = User.objects.get(username=username)
+        except User.DoesNotExist:
+            self.message_user(request, f"L'utente \"{username}\" non esiste.", messages.ERROR)
+            return
+
+        aggiornate = 0
+        for lotto in pk_a_lotti(queryset):
+            aggiornate += Maglia.objects.filter(pk__in=lotto).update(utente=nuovo_utente)
+        self.message_user(request, f"{aggiornate} maglie riassegnate a {nuovo_utente.username}.", messages.SUCCESS)
+
 # 2. Registriamo il modello usando la configurazione personalizzata
-admin.site.register(Maglia, MagliaAdmin)
\ No newline at end of file
+admin.site.register(Maglia, MagliaAdmin)
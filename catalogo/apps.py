@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class CatalogoConfig(AppConfig):
     name = 'catalogo'
+
+    def ready(self):
+        # Registra i receiver dei segnali di Maglia
+        from . import signals  # noqa: F401
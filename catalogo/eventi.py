@@ -0,0 +1,147 @@
+# catalogo/eventi.py
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Eventi in attesa per ogni client: oltre questo limite un client troppo lento perde gli eventi
+DIMENSIONE_CODA_CLIENT = 100
+
+
+class DiffusoreLocale:
+    """
+    Distribuisce gli eventi della vetrina ai client SSE collegati a questo processo.
+    Ogni client ha una asyncio.Queue sul proprio event loop; pubblica() può essere chiamato
+    da qualsiasi thread (ad esempio dai segnali di una vista sincrona).
+    """
+    def __init__(self):
+        self._iscritti = set()
+        self._lock = threading.Lock()
+
+    def iscrivi(self):
+        iscrizione = (asyncio.get_running_loop(), asyncio.Queue(maxsize=DIMENSIONE_CODA_CLIENT))
+        with self._lock:
+            self._iscritti.add(iscrizione)
+        return iscrizione
+
+    def disiscrivi(self, iscrizione):
+        with self._lock:
+            self._iscritti.discard(iscrizione)
+
+    def pubblica(self, evento):
+        self._consegna_locale(evento)
+
+    def _consegna_locale(self, evento):
+        with self._lock:
+            iscritti = list(self._iscritti)
+        for iscrizione in iscritti:
+            loop, coda = iscrizione
+            try:
+                loop.call_soon_threadsafe(self._accoda, coda, evento)
+            except RuntimeError:
+                # Event loop già chiuso: il client non c'è più, togliamo l'iscrizione
+                self.disiscrivi(iscrizione)
+
+    @staticmethod
+    def _accoda(coda, evento):
+        if not coda.full():
+            coda.put_nowait(evento)
+
+
+class DiffusorePostgres(DiffusoreLocale):
+    """
+    Variante per più worker: gli eventi passano da PostgreSQL (NOTIFY/LISTEN).
+    Ogni processo ascolta il canale con una connessione dedicata, in un thread avviato
+    al primo client collegato, e consegna le notifiche ai propri client.
+    """
+    CANALE = 'vetrina_eventi'
+
+    def __init__(self):
+        super().__init__()
+        self._ascoltatore = None
+
+    def pubblica(self, evento):
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.CANALE, json.dumps(evento)])
+
+    def iscrivi(self):
+        with self._lock:
+            if self._ascoltatore is None:
+                self._ascoltatore = threading.Thread(
+                    target=self._ascolta_notifiche, name='vetrina-eventi', daemon=True
+                )
+                self._ascoltatore.start()
+        return super().iscrivi()
+
+    def _ascolta_notifiche(self):
+        while True:
+            connessione = None
+            try:
+                wrapper = connections['default']
+                connessione = wrapper.get_new_connection(wrapper.get_connection_params())
+                connessione.autocommit = True
+                with connessione.cursor() as cursor:
+                    cursor.execute(f'LISTEN {self.CANALE}')
+                while True:
+                    if select.select([connessione], [], [], 30) == ([], [], []):
+                        continue
+                    connessione.poll()
+                    while connessione.notifies:
+                        notifica = connessione.notifies.pop(0)
+                        self._consegna_locale(json.loads(notifica.payload))
+            except Exception:
+                logger.exception("Ascolto degli eventi della vetrina interrotto, nuovo tentativo tra 5 secondi")
+                if connessione is not None:
+                    connessione.close()
+                time.sleep(5)
+
+
+_diffusore = None
+
+
+def get_diffusore():
+    """Restituisce il diffusore configurato in VETRINA_EVENTI_BACKEND (uno per processo)."""
+    global _diffusore
+    if _diffusore is None:
+        backend = getattr(settings, 'VETRINA_EVENTI_BACKEND', 'catalogo.eventi.DiffusoreLocale')
+        _diffusore = import_string(backend)()
+    return _diffusore
+
+
+def evento_maglia_pubblicata(maglia):
+    """Evento compatto con i soli dati necessari a disegnare la card nella griglia."""
+    return {
+        'tipo': 'maglia_pubblicata',
+        'id': maglia.pk,
+        'squadra': maglia.squadra,
+        'giocatore': maglia.giocatore,
+        'anno_stagione': maglia.anno_stagione,
+        'utente': maglia.utente.username,
+        'foto': maglia.foto.url if maglia.foto else '',
+        'url': reverse('dettaglio_maglia', kwargs={'pk': maglia.pk}),
+        # Serve al client per inserire la card nella posizione giusta (ordinamento -data_creazione)
+        'data_creazione': maglia.data_creazione.isoformat(),
+    }
+
+
+def evento_maglia_nascosta(maglia):
+    return {'tipo': 'maglia_nascosta', 'id': maglia.pk}
+
+
+def pubblica_dopo_commit(eventi):
+    """Pubblica gli eventi solo dopo il commit della transazione corrente."""
+    def pubblica():
+        diffusore = get_diffusore()
+        for evento in eventi:
+            diffusore.pubblica(evento)
+
+    transaction.on_commit(pubblica, robust=True)
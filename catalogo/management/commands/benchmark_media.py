@@ -0,0 +1,147 @@
+# catalogo/management/commands/benchmark_media.py
+import io
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases
+from django.urls import reverse
+
+from catalogo.models import Maglia
+from catalogo.signals import attendi_eliminazioni_media
+
+USERNAME_BENCHMARK = 'benchmark_media'
+
+
+def _immagine_jpeg(lato):
+    buffer = io.BytesIO()
+    Image.new('RGB', (lato, lato), color=(200, 30, 30)).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        "Misura, senza rete, il throughput di aggiungi_maglia e il costo di foto.url nella griglia "
+        "della vetrina a diversi livelli di concorrenza, usando lo storage locale che simula Cloudinary. "
+        "Lavora su un database di test creato e migrato per l'occasione, mai su quello configurato."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concorrenza', default='1,4,8', help="Livelli di concorrenza, separati da virgola.")
+        parser.add_argument('--richieste', type=int, default=40, help="Upload per livello di concorrenza.")
+        parser.add_argument('--lato', type=int, default=512, help="Lato (px) dell'immagine caricata.")
+        parser.add_argument('--latenza-ms', type=float, default=50, help="Latenza simulata per operazione.")
+        parser.add_argument('--banda-kbps', type=float, default=2048, help="Banda simulata (0 = illimitata).")
+        parser.add_argument('--probabilita-errore', type=float, default=0.0, help="Probabilità di errore per operazione.")
+        parser.add_argument('--latenza-url-ms', type=float, default=0, help="Latenza simulata per ogni foto.url.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        livelli = [int(livello) for livello in options['concorrenza'].split(',')]
+        storage = {
+            'BACKEND': 'catalogo.storage.CloudinaryLocaleStorage',
+            'OPTIONS': {
+                'latenza_ms': options['latenza_ms'],
+                'banda_kbps': options['banda_kbps'],
+                'probabilita_errore': options['probabilita_errore'],
+                'latenza_url_ms': options['latenza_url_ms'],
+            },
+        }
+        immagine = _immagine_jpeg(options['lato'])
+
+        # Database usa e getta, come nei test: utenti e maglie del benchmark (e i relativi
+        # eventi della vetrina) non toccano mai i dati reali
+        vecchia_configurazione = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            with tempfile.TemporaryDirectory() as media_root, override_settings(
+                MEDIA_ROOT=media_root,
+                STORAGES={'default': storage, 'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}},
+            ):
+                utente = User.objects.create_user(USERNAME_BENCHMARK)
+                try:
+                    self.stdout.write(self.style.MIGRATE_HEADING(
+                        f"aggiungi_maglia: {options['richieste']} upload da {len(immagine) / 1024:.0f} KB per livello"
+                    ))
+                    for concorrenza in livelli:
+                        self._benchmark_upload(utente, immagine, options['richieste'], concorrenza)
+
+                    self.stdout.write(self.style.MIGRATE_HEADING("Griglia della vetrina (9 maglie per pagina)"))
+                    for concorrenza in livelli:
+                        self._benchmark_griglia(utente, concorrenza)
+                finally:
+                    # Le eliminazioni delle foto sostituite vanno concluse prima che
+                    # la cartella temporanea venga rimossa
+                    attendi_eliminazioni_media()
+        finally:
+            teardown_databases(vecchia_configurazione, verbosity=0)
+
+    # --------------------------
+    # Upload end-to-end
+    # --------------------------
+    def _benchmark_upload(self, utente, immagine, richieste, concorrenza):
+        def lavoratore(quante):
+            client = Client(raise_request_exception=False)
+            client.force_login(utente)
+            riuscite = 0
+            try:
+                for i in range(quante):
+                    response = client.post(reverse('aggiungi_maglia'), {
+                        'squadra': 'Benchmark FC',
+                        'giocatore': f'Giocatore {i}',
+                        'anno_stagione': '2024/25',
+                        'visibile_in_vetrina': 'on',
+                        'foto': SimpleUploadedFile('maglia.jpg', immagine, content_type='image/jpeg'),
+                    })
+                    riuscite += response.status_code == 302
+            finally:
+                connection.close()
+            return riuscite
+
+        quote = [richieste // concorrenza + (i < richieste % concorrenza) for i in range(concorrenza)]
+        inizio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concorrenza) as executor:
+            riuscite = sum(executor.map(lavoratore, quote))
+        durata = time.perf_counter() - inizio
+
+        self.stdout.write(
+            f"  concorrenza {concorrenza:>3}: {riuscite / durata:7.1f} upload/s  "
+            f"{durata * 1000 / richieste:8.1f} ms/upload  errori {richieste - riuscite}"
+        )
+
+    # --------------------------
+    # Costo di foto.url nella griglia
+    # --------------------------
+    def _benchmark_griglia(self, utente, concorrenza, ripetizioni=50):
+        def lavoratore(indice):
+            try:
+                maglie = list(Maglia.objects.filter(utente=utente).order_by('-data_creazione')[:9])
+                inizio = time.perf_counter()
+                for _ in range(ripetizioni):
+                    for maglia in maglie:
+                        maglia.foto.url
+                durata_url = time.perf_counter() - inizio
+
+                client = Client()
+                inizio = time.perf_counter()
+                for _ in range(ripetizioni):
+                    client.get(reverse('vetrina_pubblica'))
+                durata_pagina = time.perf_counter() - inizio
+            finally:
+                connection.close()
+            return durata_url / (ripetizioni * max(len(maglie), 1)), durata_pagina / ripetizioni
+
+        with ThreadPoolExecutor(max_workers=concorrenza) as executor:
+            risultati = list(executor.map(lavoratore, range(concorrenza)))
+        per_url = sum(r[0] for r in risultati) / len(risultati)
+        per_pagina = sum(r[1] for r in risultati) / len(risultati)
+
+        self.stdout.write(
+            f"  concorrenza {concorrenza:>3}: foto.url {per_url * 1e6:8.1f} µs  "
+            f"pagina vetrina {per_pagina * 1000:8.1f} ms"
+        )
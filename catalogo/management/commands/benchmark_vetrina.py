@@ -0,0 +1,80 @@
+# catalogo/management/commands/benchmark_vetrina.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import reverse
+
+from catalogo.models import Maglia
+
+# Lo stack di middleware originale, con sessioni/autenticazione/messaggi sempre attivi
+MIDDLEWARE_STANDARD = [
+    'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+
+class Command(BaseCommand):
+    help = "Confronta le GET anonime alla vetrina tra lo stack di middleware standard e quello senza sessione."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterazioni', type=int, default=200, help="Richieste per ogni URL e configurazione.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        iterazioni = options['iterazioni']
+
+        urls = [reverse('vetrina_pubblica')]
+        maglia = Maglia.objects.filter(visibile_in_vetrina=True).only('pk').first()
+        if maglia:
+            urls.append(reverse('dettaglio_maglia', kwargs={'pk': maglia.pk}))
+        else:
+            self.stdout.write(self.style.WARNING("Nessuna maglia pubblica: misuro solo la vetrina."))
+
+        configurazioni = [
+            ('standard', MIDDLEWARE_STANDARD),
+            ('senza sessione', settings.MIDDLEWARE),
+        ]
+        for url in urls:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"GET {url} ({iterazioni} richieste)"))
+            for nome, middleware in configurazioni:
+                with override_settings(MIDDLEWARE=middleware):
+                    risultato = self._misura(url, iterazioni)
+                self.stdout.write(
+                    f"  {nome:<15} {risultato['ms']:8.2f} ms/req  "
+                    f"{risultato['query']:5.1f} query/req  "
+                    f"Vary: {risultato['vary'] or '-'}  "
+                    f"Set-Cookie: {risultato['cookie'] or '-'}"
+                )
+
+    def _misura(self, url, iterazioni):
+        client = Client()
+        # Una richiesta di riscaldamento, esclusa dalle misure
+        client.get(url)
+        client.cookies.clear()
+
+        query = 0
+        inizio = time.perf_counter()
+        for _ in range(iterazioni):
+            with CaptureQueriesContext(connection) as catturate:
+                response = client.get(url)
+            query += len(catturate)
+            # Ogni visitatore anonimo arriva senza cookie
+            client.cookies.clear()
+        durata = time.perf_counter() - inizio
+
+        return {
+            'ms': durata * 1000 / iterazioni,
+            'query': query / iterazioni,
+            'vary': response.get('Vary', ''),
+            'cookie': ', '.join(response.cookies.keys()),
+        }
@@ -0,0 +1,102 @@
+# catalogo/management/commands/pulisci_media.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from catalogo.models import Maglia
+from catalogo.storage import elenca_pagine
+
+
+class Command(BaseCommand):
+    help = (
+        "Elimina dallo storage le foto sotto maglie_foto/ non più referenziate da nessuna Maglia. "
+        "Elenca lo storage a pagine ed elimina a lotti concorrenti, con un limite di eliminazioni al secondo. "
+        "Senza --elimina si limita a elencare gli orfani."
+    )
+
+    def add_arguments(self, parser):
+        modalita = parser.add_mutually_exclusive_group()
+        modalita.add_argument('--dry-run', action='store_true', help="Mostra gli orfani senza eliminarli (default).")
+        modalita.add_argument('--elimina', action='store_true', help="Elimina davvero gli orfani.")
+        parser.add_argument('--cartella', default=Maglia._meta.get_field('foto').upload_to,
+                            help="Cartella dello storage da esaminare.")
+        parser.add_argument('--pagina', type=int, default=500, help="File elencati per pagina.")
+        parser.add_argument('--lotto', type=int, default=100, help="Eliminazioni per lotto.")
+        parser.add_argument('--concorrenza', type=int, default=4, help="Eliminazioni in parallelo.")
+        parser.add_argument('--max-al-secondo', type=float, default=20, help="Limite di eliminazioni al secondo.")
+        parser.add_argument(
+            '--eta-minima-minuti', type=int, default=60,
+            help="Ignora i file più recenti: potrebbero appartenere a un salvataggio non ancora concluso.",
+        )
+
+    def handle(self, *args, **options):
+        storage = Maglia._meta.get_field('foto').storage
+        options['dry_run'] = not options['elimina']
+        soglia = timezone.now() - timedelta(minutes=options['eta_minima_minuti'])
+
+        # 1. Nomi referenziati dal database, letti a blocchi
+        referenziati = set(
+            Maglia.objects.exclude(foto='').values_list('foto', flat=True).iterator(chunk_size=2000)
+        )
+        self.stdout.write(f"Foto referenziate nel database: {len(referenziati)}")
+
+        # 2. Scansione dello storage a pagine, eliminando gli orfani a lotti man mano
+        esaminati = orfani = eliminati = eta_sconosciuta = 0
+        lotto = []
+        with ThreadPoolExecutor(max_workers=options['concorrenza']) as executor:
+            for pagina in elenca_pagine(storage, options['cartella'], options['pagina']):
+                for nome, creazione in pagina:
+                    esaminati += 1
+                    if nome in referenziati:
+                        continue
+                    if creazione is None:
+                        # Senza una data non si può escludere un upload non ancora committato
+                        eta_sconosciuta += 1
+                        continue
+                    if creazione > soglia:
+                        continue
+                    orfani += 1
+                    lotto.append(nome)
+                    if len(lotto) >= options['lotto']:
+                        eliminati += self._elimina_lotto(executor, storage, lotto, options)
+                        lotto = []
+            if lotto:
+                eliminati += self._elimina_lotto(executor, storage, lotto, options)
+
+        if eta_sconosciuta:
+            self.stdout.write(self.style.WARNING(
+                f"{eta_sconosciuta} file non referenziati ignorati: lo storage non ne fornisce la data."
+            ))
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"[dry-run] {orfani} orfani su {esaminati} file esaminati."))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"{eliminati} orfani eliminati su {orfani} trovati ({esaminati} file esaminati)."
+            ))
+
+    def _elimina_lotto(self, executor, storage, lotto, options):
+        if options['dry_run']:
+            for nome in lotto:
+                self.stdout.write(f"  orfano: {nome}")
+            return 0
+
+        inizio = time.perf_counter()
+        esiti = list(executor.map(lambda nome: self._elimina(storage, nome), lotto))
+
+        # Limite di velocità: ogni lotto dura almeno len(lotto) / max_al_secondo secondi
+        durata_minima = len(lotto) / options['max_al_secondo']
+        attesa = durata_minima - (time.perf_counter() - inizio)
+        if attesa > 0:
+            time.sleep(attesa)
+        return sum(esiti)
+
+    def _elimina(self, storage, nome):
+        try:
+            storage.delete(nome)
+        except Exception as errore:
+            self.stderr.write(f"  eliminazione di {nome} non riuscita: {errore}")
+            return False
+        return True
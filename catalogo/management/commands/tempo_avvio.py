@@ -0,0 +1,131 @@
+# catalogo/management/commands/tempo_avvio.py
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Eseguito in un processo separato, così le importazioni partono da zero.
+# I tempi di importazione si misurano avvolgendo importlib._bootstrap._find_and_load, da cui
+# passano sia le istruzioni import sia importlib.import_module: "-X importtime" vede solo le
+# prime e perderebbe i moduli caricati da Django (models, admin, apps, middleware, urls, views).
+SCRIPT_AVVIO = """
+import json, sys, time
+import importlib
+import importlib._bootstrap as bootstrap
+
+find_and_load = bootstrap._find_and_load
+moduli = []
+figli = []
+
+def find_and_load_misurato(nome, import_):
+    if nome in sys.modules:
+        return find_and_load(nome, import_)
+    figli.append(0)
+    inizio = time.perf_counter_ns()
+    try:
+        return find_and_load(nome, import_)
+    finally:
+        cumulativo = time.perf_counter_ns() - inizio
+        tempo_figli = figli.pop()
+        if figli:
+            figli[-1] += cumulativo
+        moduli.append((nome, (cumulativo - tempo_figli) // 1000, cumulativo // 1000))
+
+bootstrap._find_and_load = find_and_load_misurato
+inizio = time.perf_counter()
+importlib.import_module(sys.argv[1])
+avvio = time.perf_counter() - inizio
+bootstrap._find_and_load = find_and_load
+
+riscaldamento = {}
+if sys.argv[2] == '1':
+    from catalogo.warmup import riscalda_worker
+    riscaldamento = riscalda_worker()
+print(json.dumps({'avvio_ms': avvio * 1000, 'riscaldamento_ms': riscaldamento, 'moduli': moduli}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Misura il tempo di avvio dell'applicazione WSGI in un processo pulito, mostra il tempo "
+        "di importazione per pacchetto (o per modulo) e fallisce se il totale supera il budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--budget', type=float, default=getattr(settings, 'AVVIO_BUDGET_MS', 3000),
+            help="Tempo massimo di avvio in millisecondi (default: AVVIO_BUDGET_MS).",
+        )
+        parser.add_argument('--top', type=int, default=15, help="Numero di pacchetti o moduli da mostrare.")
+        parser.add_argument(
+            '--per-modulo', action='store_true',
+            help="Mostra i singoli moduli più lenti (tempo proprio e cumulativo) invece dei totali per pacchetto.",
+        )
+        parser.add_argument(
+            '--pacchetto', help="Con --per-modulo, limita l'elenco ai moduli di un pacchetto (es. catalogo, cloudinary).",
+        )
+        parser.add_argument(
+            '--riscaldamento', action='store_true',
+            help="Include nel totale anche il riscaldamento del worker (catalogo.warmup).",
+        )
+
+    def handle(self, *args, **options):
+        modulo_wsgi = settings.WSGI_APPLICATION.rsplit('.', 1)[0]
+        processo = subprocess.run(
+            [sys.executable, '-c', SCRIPT_AVVIO, modulo_wsgi, '1' if options['riscaldamento'] else '0'],
+            capture_output=True, text=True, env=os.environ.copy(), cwd=settings.BASE_DIR,
+        )
+        if processo.returncode != 0:
+            raise CommandError(f"Avvio dell'applicazione non riuscito:\n{processo.stderr[-2000:]}")
+
+        misure = json.loads(processo.stdout.strip().splitlines()[-1])
+
+        # (modulo, tempo proprio, tempo cumulativo) in microsecondi. Un modulo può comparire
+        # due volte (import di un sottomodulo che importa il pacchetto padre, che a sua volta
+        # importa il sottomodulo): i tempi propri si sommano, il cumulativo è il maggiore
+        per_nome = {}
+        for modulo, self_us, cumulativo_us in misure['moduli']:
+            precedente_self, precedente_cumulativo = per_nome.get(modulo, (0, 0))
+            per_nome[modulo] = (precedente_self + self_us, max(precedente_cumulativo, cumulativo_us))
+        moduli = [(modulo, self_us, cumulativo_us) for modulo, (self_us, cumulativo_us) in per_nome.items()]
+
+        if options['per_modulo']:
+            self._mostra_moduli(moduli, options['pacchetto'], options['top'])
+        else:
+            self._mostra_pacchetti(moduli, options['top'])
+
+        totale = misure['avvio_ms']
+        self.stdout.write(f"Avvio ({modulo_wsgi}): {misure['avvio_ms']:.1f} ms")
+        for fase, ms in misure['riscaldamento_ms'].items():
+            self.stdout.write(f"Riscaldamento - {fase}: {ms:.1f} ms")
+            totale += ms
+
+        if totale > options['budget']:
+            raise CommandError(f"Avvio in {totale:.1f} ms: supera il budget di {options['budget']:.0f} ms.")
+        self.stdout.write(self.style.SUCCESS(f"Avvio in {totale:.1f} ms, entro il budget di {options['budget']:.0f} ms."))
+
+    def _mostra_pacchetti(self, moduli, top):
+        # Somma il tempo proprio di ogni modulo sul relativo pacchetto di primo livello
+        per_pacchetto = defaultdict(int)
+        for modulo, self_us, _ in moduli:
+            per_pacchetto[modulo.split('.')[0]] += self_us
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Tempo di importazione per pacchetto"))
+        classifica = sorted(per_pacchetto.items(), key=lambda voce: voce[1], reverse=True)
+        for pacchetto, microsecondi in classifica[:top]:
+            self.stdout.write(f"  {pacchetto:<30} {microsecondi / 1000:8.1f} ms")
+
+    def _mostra_moduli(self, moduli, pacchetto, top):
+        if pacchetto:
+            moduli = [voce for voce in moduli if voce[0] == pacchetto or voce[0].startswith(pacchetto + '.')]
+
+        intestazione = "Moduli più lenti (tempo proprio / cumulativo)"
+        if pacchetto:
+            intestazione += f" in {pacchetto}"
+        self.stdout.write(self.style.MIGRATE_HEADING(intestazione))
+        for modulo, self_us, cumulativo_us in sorted(moduli, key=lambda voce: voce[1], reverse=True)[:top]:
+            self.stdout.write(f"  {modulo:<50} {self_us / 1000:8.1f} ms {cumulativo_us / 1000:8.1f} ms")
@@ -0,0 +1,79 @@
+# catalogo/middleware.py
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.middleware import MessageMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.urls import Resolver404, resolve
+
+# Viste pubbliche servite senza sessione ai visitatori anonimi
+VETRINA_ANONIMA_URL = getattr(settings, 'VETRINA_ANONIMA_URL', ('vetrina_pubblica', 'dettaglio_maglia'))
+
+
+def is_richiesta_anonima_vetrina(request):
+    """
+    True se la richiesta è una GET/HEAD senza cookie di sessione verso una vista pubblica.
+    Il risultato viene memorizzato sulla richiesta, così l'URL è risolto una sola volta.
+    """
+    if not hasattr(request, '_vetrina_anonima'):
+        anonima = (
+            request.method in ('GET', 'HEAD')
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        )
+        if anonima:
+            try:
+                anonima = resolve(request.path_info).url_name in VETRINA_ANONIMA_URL
+            except Resolver404:
+                anonima = False
+        request._vetrina_anonima = anonima
+    return request._vetrina_anonima
+
+
+class VetrinaSessionMiddleware(SessionMiddleware):
+    """
+    Come SessionMiddleware, ma per le richieste anonime alla vetrina fornisce una sessione
+    vuota mai salvata: nessuna query, nessun cookie e nessun "Vary: Cookie" in risposta.
+    """
+    def process_request(self, request):
+        if is_richiesta_anonima_vetrina(request):
+            request.session = self.SessionStore()
+            return
+        super().process_request(request)
+
+    def process_response(self, request, response):
+        if is_richiesta_anonima_vetrina(request):
+            return response
+        return super().process_response(request, response)
+
+
+class VetrinaAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    Per le richieste anonime alla vetrina imposta direttamente AnonymousUser,
+    senza leggere la sessione.
+    """
+    def process_request(self, request):
+        if is_richiesta_anonima_vetrina(request):
+            request.user = AnonymousUser()
+
+            async def auser():
+                return request.user
+
+            request.auser = auser
+            return
+        super().process_request(request)
+
+
+class VetrinaMessageMiddleware(MessageMiddleware):
+    """
+    Per le richieste anonime alla vetrina salta lo storage dei messaggi
+    (il context processor restituisce una lista vuota).
+    """
+    def process_request(self, request):
+        if is_richiesta_anonima_vetrina(request):
+            return
+        super().process_request(request)
+
+    def process_response(self, request, response):
+        if is_richiesta_anonima_vetrina(request):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,91 @@
+# catalogo/signals.py
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .eventi import evento_maglia_nascosta, evento_maglia_pubblicata, pubblica_dopo_commit
+from .models import Maglia
+
+logger = logging.getLogger(__name__)
+
+# Le eliminazioni dallo storage sono chiamate di rete: le eseguiamo fuori dalla richiesta
+_executor_media = ThreadPoolExecutor(max_workers=2, thread_name_prefix='elimina-media')
+_eliminazioni_in_corso = set()
+
+
+def _elimina_file(storage, nome):
+    try:
+        storage.delete(nome)
+    except Exception:
+        # Il file resta orfano: lo recupererà il comando "pulisci_media"
+        logger.exception("Eliminazione del file '%s' dallo storage non riuscita", nome)
+
+
+def elimina_file_dopo_commit(storage, nome):
+    """
+    Pianifica l'eliminazione del file in background, solo dopo il commit della transazione
+    corrente (se la transazione viene annullata il file resta referenziato e non va toccato).
+    """
+    def avvia():
+        futuro = _executor_media.submit(_elimina_file, storage, nome)
+        _eliminazioni_in_corso.add(futuro)
+        futuro.add_done_callback(_eliminazioni_in_corso.discard)
+
+    transaction.on_commit(avvia)
+
+
+def attendi_eliminazioni_media(timeout=None):
+    """Attende la fine delle eliminazioni in background già avviate."""
+    wait(list(_eliminazioni_in_corso), timeout=timeout)
+
+
+@receiver(pre_save, sender=Maglia)
+def memorizza_stato_precedente(sender, instance, update_fields=None, **kwargs):
+    # Foto e visibilità prima del salvataggio, per eliminare la foto sostituita
+    # e notificare alla vetrina le maglie pubblicate o nascoste
+    instance._stato_precedente = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not {'foto', 'visibile_in_vetrina'} & set(update_fields):
+        return
+    instance._stato_precedente = (
+        Maglia.objects.filter(pk=instance.pk).values('foto', 'visibile_in_vetrina').first()
+    )
+
+
+@receiver(post_save, sender=Maglia)
+def elimina_foto_sostituita(sender, instance, **kwargs):
+    precedente = getattr(instance, '_stato_precedente', None)
+    if precedente and precedente['foto'] and precedente['foto'] != instance.foto.name:
+        elimina_file_dopo_commit(instance.foto.storage, precedente['foto'])
+
+
+@receiver(post_save, sender=Maglia)
+def notifica_vetrina_salvataggio(sender, instance, created, **kwargs):
+    precedente = getattr(instance, '_stato_precedente', None)
+    if not created and precedente is None:
+        # Salvataggio che non tocca la visibilità
+        return
+    era_visibile = bool(precedente and precedente['visibile_in_vetrina'])
+    if instance.visibile_in_vetrina and not era_visibile:
+        evento = evento_maglia_pubblicata(instance)
+    elif era_visibile and not instance.visibile_in_vetrina:
+        evento = evento_maglia_nascosta(instance)
+    else:
+        return
+    pubblica_dopo_commit([evento])
+
+
+@receiver(post_delete, sender=Maglia)
+def elimina_foto_maglia(sender, instance, **kwargs):
+    if instance.foto.name:
+        elimina_file_dopo_commit(instance.foto.storage, instance.foto.name)
+
+
+@receiver(post_delete, sender=Maglia)
+def notifica_vetrina_eliminazione(sender, instance, **kwargs):
+    if instance.visibile_in_vetrina:
+        pubblica_dopo_commit([evento_maglia_nascosta(instance)])
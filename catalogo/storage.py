@@ -0,0 +1,202 @@
+# catalogo/storage.py
+import os
+import random
+import string
+import time
+from datetime import datetime, timezone
+
+import cloudinary.api
+from cloudinary.exceptions import Error as CloudinaryError
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import FileSystemStorage
+from django.utils.crypto import get_random_string
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class CloudinaryLocaleStorage(FileSystemStorage):
+    """
+    Sostituto locale di MediaCloudinaryStorage, per sviluppo, CI e benchmark senza il servizio reale.
+
+    Riproduce la semantica dei nomi e degli URL di Cloudinary:
+    - i nomi ricevono il prefisso di MEDIA_URL ("media/") e un suffisso casuale di 6 caratteri;
+    - gli URL hanno la forma <MEDIA_URL><cloud_name>/image/upload/v1/<nome>
+      (come https://res.cloudinary.com/<cloud_name>/image/upload/v1/<public_id>).
+    A differenza di Cloudinary l'estensione viene mantenuta, così i file restano serviti
+    correttamente in locale.
+
+    Simula anche la rete: latenza per operazione, banda limitata in upload/download e una
+    probabilità di errore (cloudinary.exceptions.Error) sulle operazioni remote.
+    """
+    PREFISSO_URL = '{cloud_name}/image/upload/v1/'
+
+    def __init__(self, cloud_name='locale', latenza_ms=0, banda_kbps=0, probabilita_errore=0.0,
+                 latenza_url_ms=0, **kwargs):
+        self.cloud_name = cloud_name
+        self.latenza_ms = float(latenza_ms)
+        self.banda_kbps = float(banda_kbps)
+        self.probabilita_errore = float(probabilita_errore)
+        self.latenza_url_ms = float(latenza_url_ms)
+
+        prefisso_url = self.PREFISSO_URL.format(cloud_name=cloud_name)
+        kwargs.setdefault('location', os.path.join(settings.MEDIA_ROOT, prefisso_url))
+        kwargs.setdefault('base_url', f"{settings.MEDIA_URL}{prefisso_url}")
+        super().__init__(**kwargs)
+
+    # --------------------------
+    # Simulazione della rete
+    # --------------------------
+    def _rete(self, byte=0):
+        attesa = self.latenza_ms / 1000
+        if self.banda_kbps and byte:
+            attesa += byte / (self.banda_kbps * 1024)
+        if attesa:
+            time.sleep(attesa)
+        if self.probabilita_errore and random.random() < self.probabilita_errore:
+            raise CloudinaryError("Errore simulato dallo storage locale")
+
+    # --------------------------
+    # Semantica dei nomi Cloudinary
+    # --------------------------
+    def _prefisso(self):
+        prefisso = settings.MEDIA_URL.strip('/')
+        return f"{prefisso}/" if prefisso else ''
+
+    def get_available_name(self, name, max_length=None):
+        """
+        Come Cloudinary con unique_filename: aggiunge il prefisso e un suffisso casuale
+        di 6 caratteri. Se il nome esiste già, FileSystemStorage._save richiama questo
+        metodo, e ogni nuovo tentativo riceve un suffisso diverso.
+        """
+        name = name.replace('\\', '/')
+        if not name.startswith(self._prefisso()):
+            name = self._prefisso() + name
+        radice, estensione = os.path.splitext(name)
+        suffisso = '_' + get_random_string(6, string.ascii_lowercase + string.digits)
+        if max_length is not None:
+            eccesso = len(radice) + len(suffisso) + len(estensione) - max_length
+            if eccesso > 0:
+                radice = radice[:-eccesso]
+                if not os.path.basename(radice):
+                    raise SuspiciousFileOperation(
+                        f'Il nome "{name}" non può essere reso unico entro {max_length} caratteri.'
+                    )
+        return f"{radice}{suffisso}{estensione}"
+
+    def _save(self, name, content):
+        self._rete(content.size)
+        return super()._save(name, content)
+
+    # --------------------------
+    # Operazioni "remote"
+    # --------------------------
+    def _open(self, name, mode='rb'):
+        self._rete(self.size(name))
+        return super()._open(name, mode)
+
+    def delete(self, name):
+        self._rete()
+        super().delete(name)
+
+    def exists(self, name):
+        self._rete()
+        return super().exists(name)
+
+    def elenca_pagine(self, cartella, dimensione_pagina):
+        """
+        Come la Admin API di Cloudinary: restituisce i file sotto <prefisso><cartella>
+        a pagine di (nome, data di creazione), con un ritardo di rete per pagina.
+        """
+        cartella = self._prefisso() + cartella.strip('/')
+        radice = self.path(cartella)
+        pagina = []
+        for percorso_dir, _, file in os.walk(radice):
+            for nome_file in sorted(file):
+                percorso = os.path.join(percorso_dir, nome_file)
+                nome = os.path.relpath(percorso, self.location).replace(os.sep, '/')
+                creazione = datetime.fromtimestamp(os.path.getmtime(percorso), tz=timezone.utc)
+                pagina.append((nome, creazione))
+                if len(pagina) == dimensione_pagina:
+                    self._rete()
+                    yield pagina
+                    pagina = []
+        if pagina:
+            self._rete()
+            yield pagina
+
+    def url(self, name):
+        if self.latenza_url_ms:
+            time.sleep(self.latenza_url_ms / 1000)
+        return super().url(name)
+
+
+def elenca_pagine(storage, cartella, dimensione_pagina=500):
+    """
+    Elenca, una pagina alla volta, i file dello storage sotto la cartella indicata
+    (ad es. 'maglie_foto/'), come liste di (nome, data di creazione o None se sconosciuta).
+    I nomi sono quelli salvati nei FileField, quindi confrontabili con il database.
+    """
+    if hasattr(storage, 'elenca_pagine'):
+        yield from storage.elenca_pagine(cartella, dimensione_pagina)
+    # Confronto sul modulo: importare cloudinary_storage richiede le credenziali
+    elif storage.__class__.__module__ == 'cloudinary_storage.storage':
+        opzioni = {
+            'type': 'upload',
+            'resource_type': storage.RESOURCE_TYPE,
+            'prefix': storage._prepend_prefix(cartella.strip('/') + '/'),
+            'max_results': min(dimensione_pagina, 500),  # Limite della Admin API
+        }
+        while True:
+            risposta = cloudinary.api.resources(**opzioni)
+            yield [
+                (risorsa['public_id'], datetime.fromisoformat(risorsa['created_at'].replace('Z', '+00:00')))
+                for risorsa in risposta['resources']
+            ]
+            if not risposta.get('next_cursor'):
+                return
+            opzioni['next_cursor'] = risposta['next_cursor']
+    elif isinstance(storage, FileSystemStorage):
+        # Disco locale: la cartella viene letta man mano con scandir, senza caricarla tutta
+        cartella = cartella.strip('/')
+        try:
+            voci = os.scandir(storage.path(cartella))
+        except FileNotFoundError:
+            # Nessun upload ancora: la cartella non esiste
+            return
+        with voci:
+            nomi = (f"{cartella}/{voce.name}" for voce in voci if voce.is_file())
+            yield from _a_pagine(storage, nomi, dimensione_pagina)
+    else:
+        # Storage generico: listdir è l'unico modo di elencare, le date si leggono per pagina
+        cartella = cartella.strip('/')
+        try:
+            _, file = storage.listdir(cartella)
+        except FileNotFoundError:
+            return
+        yield from _a_pagine(storage, (f"{cartella}/{nome}" for nome in file), dimensione_pagina)
+
+
+def _a_pagine(storage, nomi, dimensione_pagina):
+    pagina = []
+    for nome in nomi:
+        pagina.append(nome)
+        if len(pagina) == dimensione_pagina:
+            yield [(nome, _data_creazione(storage, nome)) for nome in pagina]
+            pagina = []
+    if pagina:
+        yield [(nome, _data_creazione(storage, nome)) for nome in pagina]
+
+def _data_creazione(storage, nome):
+    """
+    Data del file per il controllo dell'età: la più recente tra creazione e modifica
+    (su disco la "creazione" è il ctime, che cambia anche dopo la scrittura).
+    None se lo storage non fornisce nessuna delle due.
+    """
+    date = []
+    for metodo in (storage.get_created_time, storage.get_modified_time):
+        try:
+            date.append(metodo(nome))
+        except (NotImplementedError, OSError):
+            continue
+    return max(date) if date else None
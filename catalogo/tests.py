@@ -1,3 +1,580 @@
-from django.test import TestCase
+import asyncio
+import os
+import runpy
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import admin as catalogo_admin
+from . import warmup
+from .eventi import DiffusoreLocale
+from .models import Maglia
+from .signals import attendi_eliminazioni_media
+from .storage import CloudinaryLocaleStorage, elenca_pagine
+
+
+def crea_maglia(utente, **campi):
+    valori = {
+        'squadra': 'Squadra',
+        'giocatore': 'Giocatore',
+        'anno_stagione': '2024/25',
+        'foto': 'maglie_foto/maglia.jpg',
+    }
+    valori.update(campi)
+    return Maglia.objects.create(utente=utente, **valori)
+
+
+# --------------------------
+# Pannello Admin
+# --------------------------
+class PkALottiTest(TestCase):
+    def setUp(self):
+        utente = User.objects.create_user('collezionista')
+        self.pks = [crea_maglia(utente).pk for _ in range(7)]
+
+    def test_lotti_coprono_tutte_le_chiavi_senza_ripetizioni(self):
+        lotti = list(catalogo_admin.pk_a_lotti(Maglia.objects.all(), 3))
+        self.assertEqual([len(lotto) for lotto in lotti], [3, 3, 1])
+        self.assertEqual(sum(lotti, []), sorted(self.pks))
+
+    def test_lotto_esatto_non_produce_lotti_vuoti(self):
+        lotti = list(catalogo_admin.pk_a_lotti(Maglia.objects.all(), 7))
+        self.assertEqual(lotti, [sorted(self.pks)])
+
+    def test_queryset_vuoto(self):
+        self.assertEqual(list(catalogo_admin.pk_a_lotti(Maglia.objects.none(), 3)), [])
+
+
+class PaginatorStimatoTest(TestCase):
+    def setUp(self):
+        utente = User.objects.create_user('collezionista')
+        for squadra in ('Milan', 'Milan', 'Inter'):
+            crea_maglia(utente, squadra=squadra)
+
+    def postgres_con_stima(self, stima):
+        """Simula PostgreSQL con pg_class.reltuples pari a "stima"."""
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value.fetchone.return_value = (stima,)
+        return mock.patch.multiple(connection, vendor='postgresql', cursor=mock.Mock(return_value=cursor))
+
+    def test_su_altri_database_conta_esattamente(self):
+        paginator = catalogo_admin.PaginatorStimato(Maglia.objects.order_by('pk'), 100)
+        self.assertEqual(paginator.count, 3)
+
+    @override_settings(ADMIN_SOGLIA_CONTEGGIO_STIMATO=1000)
+    def test_stima_senza_filtri(self):
+        paginator = catalogo_admin.PaginatorStimato(Maglia.objects.order_by('pk'), 100)
+        with self.postgres_con_stima(50000):
+            self.assertEqual(paginator.count, 50000)
+
+    @override_settings(ADMIN_SOGLIA_CONTEGGIO_STIMATO=1000)
+    def test_con_filtri_conta_esattamente(self):
+        # La query su pg_class fallirebbe su SQLite: basta che non venga eseguita
+        paginator = catalogo_admin.PaginatorStimato(Maglia.objects.filter(squadra='Milan').order_by('pk'), 100)
+        with mock.patch.object(connection, 'vendor', 'postgresql'):
+            self.assertEqual(paginator.count, 2)
+
+    @override_settings(ADMIN_SOGLIA_CONTEGGIO_STIMATO=1000)
+    def test_sotto_la_soglia_conta_esattamente(self):
+        paginator = catalogo_admin.PaginatorStimato(Maglia.objects.order_by('pk'), 100)
+        with self.postgres_con_stima(500), mock.patch('django.core.paginator.Paginator.count', 3):
+            self.assertEqual(paginator.count, 3)
+
+class AzioniAdminTest(TestCase):
+    url = '/admin/catalogo/maglia/'
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('amministratore', 'admin@example.com', 'password')
+        self.collezionista = User.objects.create_user('collezionista')
+        self.client.force_login(self.admin)
+
+    def esegui(self, azione, pks, filtro='', **dati):
+        return self.client.post(self.url + filtro, {
+            'action': azione,
+            '_selected_action': pks,
+            **dati,
+        }, follow=True)
+
+    def test_inverti_visibilita_selezione(self):
+        visibile = crea_maglia(self.collezionista, visibile_in_vetrina=True)
+        privata = crea_maglia(self.collezionista)
+
+        self.esegui('inverti_visibilita_vetrina', [visibile.pk, privata.pk])
+
+        visibile.refresh_from_db()
+        privata.refresh_from_db()
+        self.assertFalse(visibile.visibile_in_vetrina)
+        self.assertTrue(privata.visibile_in_vetrina)
+
+    def test_inverti_visibilita_seleziona_tutto_su_lista_filtrata(self):
+        # Il filtro è sulla stessa colonna modificata dall'azione: ogni lotto fa uscire
+        # le righe dal filtro, ma nessuna deve essere saltata o invertita due volte
+        visibili = [crea_maglia(self.collezionista, visibile_in_vetrina=True) for _ in range(7)]
+        private = [crea_maglia(self.collezionista) for _ in range(3)]
+
+        with override_settings(ADMIN_DIMENSIONE_LOTTO=2):
+            self.esegui(
+                'inverti_visibilita_vetrina', [visibili[0].pk],
+                filtro='?visibile_in_vetrina__exact=1', select_across='1', index='0',
+            )
+
+        self.assertFalse(Maglia.objects.filter(visibile_in_vetrina=True).exists())
+        self.assertEqual(Maglia.objects.filter(pk__in=[m.pk for m in private], visibile_in_vetrina=False).count(), 3)
+
+    def test_riassegna_proprietario(self):
+        nuovo = User.objects.create_user('nuovo')
+        maglie = [crea_maglia(self.collezionista) for _ in range(5)]
+
+        with override_settings(ADMIN_DIMENSIONE_LOTTO=2):
+            response = self.esegui('riassegna_proprietario', [m.pk for m in maglie], nuovo_utente='nuovo')
+
+        self.assertEqual(Maglia.objects.filter(utente=nuovo).count(), 5)
+        self.assertIn("5 maglie riassegnate a nuovo.", [str(m) for m in response.context['messages']])
+
+    def test_riassegna_proprietario_utente_inesistente(self):
+        maglia = crea_maglia(self.collezionista)
+
+        response = self.esegui('riassegna_proprietario', [maglia.pk], nuovo_utente='fantasma')
+
+        maglia.refresh_from_db()
+        self.assertEqual(maglia.utente, self.collezionista)
+        self.assertIn("L'utente \"fantasma\" non esiste.", [str(m) for m in response.context['messages']])
+
+    def test_riassegna_proprietario_senza_username(self):
+        maglia = crea_maglia(self.collezionista)
+
+        response = self.esegui('riassegna_proprietario', [maglia.pk])
+
+        maglia.refresh_from_db()
+        self.assertEqual(maglia.utente, self.collezionista)
+        self.assertIn("Indica lo username del nuovo proprietario.", [str(m) for m in response.context['messages']])
+
+
+# --------------------------
+# Vetrina anonima senza sessione
+# --------------------------
+class VetrinaAnonimaMiddlewareTest(TestCase):
+    def setUp(self):
+        self.utente = User.objects.create_user('collezionista', password='password')
+        self.maglia = crea_maglia(self.utente, visibile_in_vetrina=True)
+        self.url_vetrina = [
+            reverse('vetrina_pubblica'),
+            reverse('dettaglio_maglia', kwargs={'pk': self.maglia.pk}),
+        ]
+
+    def test_get_anonima_senza_cookie_ne_vary(self):
+        for url in self.url_vetrina:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('Cookie', response.get('Vary', ''))
+                self.assertEqual(len(response.cookies), 0)
+                self.assertTrue(response.wsgi_request._vetrina_anonima)
+
+    def test_utente_autenticato_mantiene_utente_e_messaggi(self):
+        self.client.force_login(self.utente)
+        altra = crea_maglia(self.utente, giocatore='Da Eliminare')
+        # elimina_maglia aggiunge un messaggio, che deve comparire sulla vetrina
+        self.client.post(reverse('elimina_maglia', kwargs={'pk': altra.pk}))
+
+        response = self.client.get(self.url_vetrina[0])
+        self.assertFalse(response.wsgi_request._vetrina_anonima)
+        self.assertEqual(response.wsgi_request.user, self.utente)
+        self.assertContains(response, "La maglia di Da Eliminare è stata rimossa.")
+        self.assertIn('Cookie', response['Vary'])
+
+        response = self.client.get(self.url_vetrina[1])
+        self.assertEqual(response.wsgi_request.user, self.utente)
+        self.assertTrue(response.context['is_owner'])
+
+    def test_post_usa_la_sessione(self):
+        response = self.client.post(self.url_vetrina[0])
+        self.assertFalse(response.wsgi_request._vetrina_anonima)
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_url_fuori_dalla_vetrina_usa_la_sessione(self):
+        response = self.client.get(reverse('login'))
+        self.assertFalse(response.wsgi_request._vetrina_anonima)
+        self.assertIn('Cookie', response['Vary'])
+
+
+# --------------------------
+# Storage locale che simula Cloudinary
+# --------------------------
+class CloudinaryLocaleStorageTest(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        self.storage = CloudinaryLocaleStorage(location=self.media_root, base_url='/media/locale/image/upload/v1/')
+
+    def test_nome_con_prefisso_e_suffisso(self):
+        nome = self.storage.save('maglie_foto/maglia.jpg', ContentFile(b'x'))
+        self.assertRegex(nome, r'^media/maglie_foto/maglia_[a-z0-9]{6}\.jpg$')
+        self.assertEqual(self.storage.url(nome), f'/media/locale/image/upload/v1/{nome}')
+
+    def test_collisione_del_suffisso_genera_un_nuovo_nome(self):
+        with mock.patch('catalogo.storage.get_random_string', side_effect=['aaaaaa', 'aaaaaa', 'bbbbbb']):
+            primo = self.storage.save('maglie_foto/maglia.jpg', ContentFile(b'1'))
+            secondo = self.storage.save('maglie_foto/maglia.jpg', ContentFile(b'2'))
+
+        self.assertEqual(primo, 'media/maglie_foto/maglia_aaaaaa.jpg')
+        self.assertNotEqual(secondo, primo)
+        with self.storage.open(primo) as file:
+            self.assertEqual(file.read(), b'1')
+
+    def test_rispetta_max_length(self):
+        nome = self.storage.get_available_name('maglie_foto/' + 'x' * 200 + '.jpg', max_length=100)
+        self.assertEqual(len(nome), 100)
+        self.assertTrue(nome.endswith('.jpg'))
+
+
+
+# --------------------------
+# Avvio e riscaldamento dei worker
+# --------------------------
+class RiscaldamentoTest(TestCase):
+    def test_esegue_tutte_le_fasi(self):
+        durate = warmup.riscalda_worker()
+
+        self.assertEqual(list(durate), ['template', 'url', 'database', 'cache e storage'])
+        self.assertTrue(all(ms >= 0 for ms in durate.values()))
+
+    def test_fase_fallita_registrata_senza_errore(self):
+        def fallisce():
+            raise RuntimeError("fase rotta")
+
+        fasi = (('rotta', fallisce), ('template', warmup._precarica_template))
+        with mock.patch.object(warmup, 'FASI_RISCALDAMENTO', fasi), \
+                self.assertLogs('catalogo.warmup', 'ERROR') as log:
+            durate = warmup.riscalda_worker()
+
+        self.assertEqual(list(durate), ['rotta', 'template'])
+        self.assertIn("fase 'rotta' non riuscita", log.output[0])
+
+    def test_risolve_tutte_le_rotte(self):
+        from .urls import urlpatterns
+
+        with mock.patch.object(warmup, 'resolve', wraps=warmup.resolve) as resolve:
+            warmup._risolvi_url()
+
+        risolte = {chiamata.args[0] for chiamata in resolve.call_args_list}
+        self.assertEqual(
+            {warmup.resolve(url).url_name for url in risolte},
+            {pattern.name for pattern in urlpatterns},
+        )
+
+    def test_ping_salta_il_database_sqlite_inesistente(self):
+        cartella = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cartella)
+        percorso = os.path.join(cartella, 'db.sqlite3')
+
+        with mock.patch.dict(connection.settings_dict, {'NAME': percorso}), \
+                mock.patch.object(connection, 'vendor', 'sqlite'), \
+                self.assertLogs('catalogo.warmup', 'WARNING'):
+            warmup._ping_database()
+
+        self.assertFalse(os.path.exists(percorso))
+
+
+    def test_hook_gunicorn_registra_il_riscaldamento(self):
+        configurazione = runpy.run_path(os.path.join(settings.BASE_DIR, 'gunicorn.conf.py'))
+        worker = mock.Mock(pid=1234)
+
+        with mock.patch.object(warmup, 'riscalda_worker', return_value={'template': 10.0, 'url': 5.0}):
+            configurazione['post_worker_init'](worker)
+
+        messaggio, pid, totale, dettaglio = worker.log.info.call_args.args
+        self.assertEqual((pid, totale), (1234, 15.0))
+        self.assertEqual(dettaglio, "template 10 ms, url 5 ms")
+
+class TempoAvvioTest(SimpleTestCase):
+    def test_budget_superato(self):
+        output = StringIO()
+        with self.assertRaisesMessage(CommandError, "supera il budget di 0 ms"):
+            call_command('tempo_avvio', '--budget', '0', stdout=output)
+
+        self.assertIn("Tempo di importazione per pacchetto", output.getvalue())
+
+    def test_per_modulo_include_i_moduli_caricati_da_django(self):
+        output = StringIO()
+        call_command('tempo_avvio', '--per-modulo', '--pacchetto', 'catalogo', '--top', '50', stdout=output)
+
+        for modulo in ('catalogo.models', 'catalogo.admin', 'catalogo.middleware'):
+            self.assertIn(modulo, output.getvalue())
+
+# --------------------------
+# Eliminazione delle foto e garbage collection dei media
+# --------------------------
+class MediaLocaleTestMixin:
+    """Usa CloudinaryLocaleStorage su una MEDIA_ROOT temporanea per tutta la durata del test."""
+    backend_storage = 'catalogo.storage.CloudinaryLocaleStorage'
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        impostazioni = override_settings(
+            MEDIA_ROOT=media_root,
+            STORAGES={
+                'default': {'BACKEND': self.backend_storage},
+                'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+            },
+        )
+        impostazioni.enable()
+        self.addCleanup(impostazioni.disable)
+        self.utente = User.objects.create_user('collezionista')
+
+    def salva_file(self, nome='maglie_foto/maglia.jpg', eta_minuti=0):
+        nome = default_storage.save(nome, ContentFile(b'foto'))
+        if eta_minuti:
+            istante = time.time() - eta_minuti * 60
+            os.utime(default_storage.path(nome), (istante, istante))
+        return nome
+
+
+class EliminazioneFotoTest(MediaLocaleTestMixin, TestCase):
+    def test_foto_sostituita_eliminata_solo_dopo_il_commit(self):
+        vecchia = self.salva_file()
+        maglia = crea_maglia(self.utente, foto=vecchia)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            maglia.foto = self.salva_file()
+            maglia.save()
+            attendi_eliminazioni_media()
+            self.assertTrue(default_storage.exists(vecchia))
+
+        for callback in callbacks:
+            callback()
+        attendi_eliminazioni_media()
+        self.assertFalse(default_storage.exists(vecchia))
+        self.assertTrue(default_storage.exists(maglia.foto.name))
+
+    def test_rollback_non_elimina_nulla(self):
+        vecchia = self.salva_file()
+        maglia = crea_maglia(self.utente, foto=vecchia)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    maglia.foto = self.salva_file()
+                    maglia.save()
+                    raise RuntimeError("annulla la transazione")
+            except RuntimeError:
+                pass
+            try:
+                with transaction.atomic():
+                    Maglia.objects.get(pk=maglia.pk).delete()
+                    raise RuntimeError("annulla la transazione")
+            except RuntimeError:
+                pass
+        attendi_eliminazioni_media()
+
+        self.assertTrue(default_storage.exists(vecchia))
+
+    def test_eliminazione_maglia_dopo_il_commit(self):
+        foto = self.salva_file()
+        maglia = crea_maglia(self.utente, foto=foto)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            maglia.delete()
+        attendi_eliminazioni_media()
+
+        self.assertFalse(default_storage.exists(foto))
+
+
+class PulisciMediaTest(MediaLocaleTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.referenziato = self.salva_file(eta_minuti=120)
+        crea_maglia(self.utente, foto=self.referenziato)
+        self.orfano = self.salva_file(eta_minuti=120)
+        self.recente = self.salva_file()
+
+    def pulisci(self, *argomenti):
+        output = StringIO()
+        call_command('pulisci_media', *argomenti, stdout=output, stderr=StringIO())
+        return output.getvalue()
+
+    def test_dry_run_elenca_gli_orfani_senza_eliminare(self):
+        output = self.pulisci('--dry-run')
+
+        self.assertIn(f"orfano: {self.orfano}", output)
+        self.assertNotIn(self.referenziato, output)
+        self.assertNotIn(self.recente, output)
+        for nome in (self.referenziato, self.orfano, self.recente):
+            self.assertTrue(default_storage.exists(nome))
+
+    def test_senza_elimina_non_cancella(self):
+        self.pulisci()
+        self.assertTrue(default_storage.exists(self.orfano))
+
+    def test_elimina_solo_orfani_non_recenti(self):
+        output = self.pulisci('--elimina', '--max-al-secondo', '1000')
+
+        self.assertIn("1 orfani eliminati", output)
+        self.assertFalse(default_storage.exists(self.orfano))
+        self.assertTrue(default_storage.exists(self.referenziato))
+        self.assertTrue(default_storage.exists(self.recente))
+
+
+class PulisciMediaStorageGenericoTest(MediaLocaleTestMixin, TestCase):
+    backend_storage = 'django.core.files.storage.FileSystemStorage'
+
+    def test_usa_la_data_del_file(self):
+        orfano = self.salva_file(eta_minuti=120)
+        recente = self.salva_file()
+        storage = default_storage._wrapped
+        # Su disco il ctime non si può retrodatare: simuliamo un file creato due ore fa
+        due_ore_fa = timezone.now() - timedelta(hours=2)
+        data_reale = storage.get_created_time
+
+        def get_created_time(nome):
+            return due_ore_fa if nome == orfano else data_reale(nome)
+
+        with mock.patch.object(storage, 'get_created_time', side_effect=get_created_time):
+            call_command('pulisci_media', '--elimina', '--max-al-secondo', '1000', stdout=StringIO())
+
+        self.assertFalse(default_storage.exists(orfano))
+        self.assertTrue(default_storage.exists(recente))
+
+    def test_data_sconosciuta_non_elimina(self):
+        orfano = self.salva_file(eta_minuti=120)
+        storage = default_storage._wrapped
+
+        with mock.patch.object(storage, 'get_created_time', side_effect=NotImplementedError), \
+                mock.patch.object(storage, 'get_modified_time', side_effect=NotImplementedError):
+            output = StringIO()
+            call_command('pulisci_media', '--elimina', stdout=output)
+
+        self.assertIn("1 file non referenziati ignorati", output.getvalue())
+        self.assertTrue(default_storage.exists(orfano))
+
+    def test_cartella_inesistente(self):
+        output = StringIO()
+        call_command('pulisci_media', stdout=output)
+
+        self.assertIn("[dry-run] 0 orfani su 0 file esaminati", output.getvalue())
+
+    def test_elenca_a_pagine(self):
+        nomi = {self.salva_file() for _ in range(5)}
+
+        pagine = list(elenca_pagine(default_storage._wrapped, 'maglie_foto/', dimensione_pagina=2))
+
+        self.assertEqual([len(pagina) for pagina in pagine], [2, 2, 1])
+        self.assertEqual({nome for pagina in pagine for nome, _ in pagina}, nomi)
+
+
+# --------------------------
+# Eventi live della vetrina
+# --------------------------
+class EventiVetrinaTest(TestCase):
+    def setUp(self):
+        self.utente = User.objects.create_superuser('amministratore', 'admin@example.com', 'password')
+        self.client.force_login(self.utente)
+
+    def test_azione_admin_pubblica_eventi_dopo_il_commit(self):
+        visibile = crea_maglia(self.utente, visibile_in_vetrina=True)
+        privata = crea_maglia(self.utente)
+        diffusore = mock.Mock()
+
+        with mock.patch('catalogo.eventi.get_diffusore', return_value=diffusore):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post('/admin/catalogo/maglia/', {
+                    'action': 'inverti_visibilita_vetrina',
+                    '_selected_action': [visibile.pk, privata.pk],
+                })
+                diffusore.pubblica.assert_not_called()
+
+        eventi = {(chiamata.args[0]['tipo'], chiamata.args[0]['id']) for chiamata in diffusore.pubblica.call_args_list}
+        self.assertEqual(eventi, {('maglia_nascosta', visibile.pk), ('maglia_pubblicata', privata.pk)})
+
+    def test_evento_pubblicata_contiene_la_data_di_creazione(self):
+        diffusore = mock.Mock()
+        with mock.patch('catalogo.eventi.get_diffusore', return_value=diffusore):
+            with self.captureOnCommitCallbacks(execute=True):
+                maglia = crea_maglia(self.utente, visibile_in_vetrina=True)
+
+        evento = diffusore.pubblica.call_args.args[0]
+        self.assertEqual(evento['data_creazione'], maglia.data_creazione.isoformat())
+
+    def test_maglia_nascosta_o_eliminata_dai_segnali(self):
+        maglia = crea_maglia(self.utente, visibile_in_vetrina=True)
+        altra = crea_maglia(self.utente, visibile_in_vetrina=True)
+        pk_altra = altra.pk
+        diffusore = mock.Mock()
+
+        with mock.patch('catalogo.eventi.get_diffusore', return_value=diffusore):
+            with self.captureOnCommitCallbacks(execute=True):
+                maglia.visibile_in_vetrina = False
+                maglia.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                altra.delete()
+
+        eventi = [(chiamata.args[0]['tipo'], chiamata.args[0]['id']) for chiamata in diffusore.pubblica.call_args_list]
+        self.assertEqual(eventi, [('maglia_nascosta', maglia.pk), ('maglia_nascosta', pk_altra)])
+
+    def test_salvataggio_senza_cambio_di_visibilita_non_pubblica(self):
+        maglia = crea_maglia(self.utente, visibile_in_vetrina=True)
+        diffusore = mock.Mock()
+
+        with mock.patch('catalogo.eventi.get_diffusore', return_value=diffusore):
+            with self.captureOnCommitCallbacks(execute=True):
+                maglia.giocatore = 'Altro'
+                maglia.save()
+
+        diffusore.pubblica.assert_not_called()
+
+
+class FlussoEventiVetrinaTest(TestCase):
+    def test_sotto_wsgi_risponde_204(self):
+        response = self.client.get(reverse('eventi_vetrina'))
+        self.assertEqual(response.status_code, 204)
+
+    async def test_sotto_asgi_consegna_gli_eventi(self):
+        diffusore = DiffusoreLocale()
+        with mock.patch('catalogo.views.get_diffusore', return_value=diffusore):
+            response = await self.async_client.get(reverse('eventi_vetrina'))
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'text/event-stream')
+            self.assertNotIn('Vary', response)
+            self.assertNotIn('Set-Cookie', response)
+
+            contenuto = aiter(response.streaming_content)
+            self.assertEqual(await anext(contenuto), b"retry: 5000\n\n")
+
+            diffusore.pubblica({'tipo': 'maglia_nascosta', 'id': 7})
+            evento = await asyncio.wait_for(anext(contenuto), timeout=5)
+            self.assertEqual(evento, b'event: maglia_nascosta\ndata: {"tipo": "maglia_nascosta", "id": 7}\n\n')
+
+            await contenuto.aclose()
+
+
+class DiffusoreLocaleTest(SimpleTestCase):
+    def test_iscrizioni_con_loop_chiuso_vengono_rimosse(self):
+        diffusore = DiffusoreLocale()
+
+        async def iscrivi():
+            return diffusore.iscrivi()
+
+        loop = asyncio.new_event_loop()
+        iscrizione = loop.run_until_complete(iscrivi())
+        loop.close()
+
+        diffusore.pubblica({'tipo': 'maglia_nascosta', 'id': 1})
+
+        self.assertNotIn(iscrizione, diffusore._iscritti)
@@ -24,6 +24,9 @@ urlpatterns = [
     # Vetrina Dettaglio Maglia
     path('maglia/<int:pk>/', views.dettaglio_maglia, name='dettaglio_maglia'),
     
+    # Eventi live della vetrina (Server-Sent Events, solo ASGI)
+    path('vetrina/eventi/', views.eventi_vetrina, name='eventi_vetrina'),
+    
     # Statistiche Collezione (privata)
     path('statistiche/', views.statistiche, name='statistiche'),
 ]
\ No newline at end of file
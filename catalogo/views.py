@@ -2,13 +2,18 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required 
 from django.contrib import messages
-from django.http import Http404 
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.urls import reverse
 from .models import Maglia
 from .forms import MagliaForm, RegisterForm 
 from django.db.models import Q, Count
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.contrib.auth.models import User  # Fondamentale per il filtro utente
+from django.conf import settings
+from .eventi import get_diffusore
+import asyncio
+import json
 
 # --------------------------
 # 1. Vetrina Pubblica (Home Page)
@@ -220,4 +225,40 @@ def register_user(request):
     else:
         form = RegisterForm()
         
-    return render(request, 'catalogo/register.html', {'form': form, 'titolo_pagina': "Registrazione"})
\ No newline at end of file
+    return render(request, 'catalogo/register.html', {'form': form, 'titolo_pagina': "Registrazione"})
+
+# --------------------------
+# 9. Eventi Live della Vetrina (Server-Sent Events)
+# --------------------------
+async def eventi_vetrina(request):
+    """
+    Flusso SSE con le maglie appena pubblicate o nascoste, usato dalla vetrina
+    per aggiornare la griglia senza ricaricare la pagina. Richiede un server ASGI.
+    """
+    if not isinstance(request, ASGIRequest):
+        # Sotto WSGI il flusso terrebbe occupato un worker: 204 dice a EventSource di non riconnettersi
+        return HttpResponse(status=204)
+
+    heartbeat = getattr(settings, 'VETRINA_EVENTI_HEARTBEAT', 15)
+
+    async def flusso():
+        diffusore = get_diffusore()
+        iscrizione = diffusore.iscrivi()
+        _, coda = iscrizione
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    evento = await asyncio.wait_for(coda.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # Commento SSE: tiene viva la connessione attraverso i proxy
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {evento['tipo']}\ndata: {json.dumps(evento)}\n\n"
+        finally:
+            diffusore.disiscrivi(iscrizione)
+
+    response = StreamingHttpResponse(flusso(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disattiva il buffering di nginx
+    return response
@@ -0,0 +1,74 @@
+# catalogo/warmup.py
+import logging
+import os
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.core.cache import caches
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.template.loader import get_template
+from django.urls import resolve, reverse
+
+logger = logging.getLogger(__name__)
+
+
+def _precarica_template():
+    """Compila tutti i template dell'app (finiscono nel loader con cache)."""
+    cartella = Path(apps.get_app_config('catalogo').path) / 'templates'
+    for percorso in cartella.rglob('*.html'):
+        get_template(percorso.relative_to(cartella).as_posix())
+
+
+def _risolvi_url():
+    """Costruisce il resolver percorrendo tutte le rotte di catalogo/urls.py in entrambi i sensi."""
+    from catalogo.urls import urlpatterns
+
+    for pattern in urlpatterns:
+        # Valore fittizio per ogni parametro (<int:pk> -> 1)
+        kwargs = {nome: 1 for nome in pattern.pattern.converters}
+        resolve(reverse(pattern.name, kwargs=kwargs))
+
+
+def _ping_database():
+    for connection in connections.all():
+        if (connection.vendor == 'sqlite' and not connection.is_in_memory_db()
+                and not os.path.exists(connection.settings_dict['NAME'])):
+            # Connettersi creerebbe un file SQLite vuoto: il database non è ancora stato migrato
+            logger.warning("Riscaldamento: database '%s' inesistente, ping saltato", connection.alias)
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+
+def _prepara_cache_e_storage():
+    for cache in caches.all(initialized_only=False):
+        cache.get('riscaldamento')
+    # Istanzia lo storage dei media (importa cloudinary e ne legge la configurazione)
+    default_storage._setup()
+
+
+FASI_RISCALDAMENTO = (
+    ('template', _precarica_template),
+    ('url', _risolvi_url),
+    ('database', _ping_database),
+    ('cache e storage', _prepara_cache_e_storage),
+)
+
+
+def riscalda_worker():
+    """
+    Esegue le operazioni che altrimenti pagherebbero le prime richieste di un worker appena avviato.
+    Restituisce la durata in millisecondi di ogni fase; una fase che fallisce viene
+    registrata nel log senza bloccare l'avvio.
+    """
+    durate = {}
+    for nome, fase in FASI_RISCALDAMENTO:
+        inizio = time.perf_counter()
+        try:
+            fase()
+        except Exception:
+            logger.exception("Riscaldamento: fase '%s' non riuscita", nome)
+        durate[nome] = (time.perf_counter() - inizio) * 1000
+    return durate
@@ -63,16 +63,16 @@ CLOUDINARY_STORAGE = {
     'API_SECRET': os.getenv('CLOUDINARY_API_SECRET'),
 }
 
-DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
-
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    # Versioni di sessioni/autenticazione/messaggi che saltano la sessione per i visitatori
+    # anonimi della vetrina (vedi catalogo/middleware.py)
+    'catalogo.middleware.VetrinaSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'catalogo.middleware.VetrinaAuthenticationMiddleware',
+    'catalogo.middleware.VetrinaMessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -118,6 +118,71 @@ else:
     }
 
 
+# ---------------------------------------------
+# CACHE & SESSIONI
+# ---------------------------------------------
+
+# CACHE_BACKEND: 'locmem' (default, per processo) oppure 'file' (condivisa tra i processi della stessa macchina)
+if os.environ.get('CACHE_BACKEND') == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(BASE_DIR, '.cache')),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# SESSION_BACKEND: 'cached_db' (default: cache con fallback sul database), 'cache' (solo cache) oppure 'db'.
+# Le sessioni solo in cache richiedono una cache condivisa tra i worker: con la LocMemCache
+# (una per processo) ogni worker avrebbe le sue sessioni, quindi si ripiega su 'cached_db'.
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND')
+if SESSION_BACKEND == 'cache' and CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    SESSION_BACKEND = 'cached_db'
+
+SESSION_ENGINE = {
+    'cache': 'django.contrib.sessions.backends.cache',
+    'db': 'django.contrib.sessions.backends.db',
+}.get(SESSION_BACKEND, 'django.contrib.sessions.backends.cached_db')
+
+# Viste servite senza sessione né messaggi alle GET anonime (risposte senza cookie e cacheabili)
+VETRINA_ANONIMA_URL = ('vetrina_pubblica', 'dettaglio_maglia', 'eventi_vetrina')
+
+# Distribuzione degli eventi live della vetrina (SSE): 'catalogo.eventi.DiffusoreLocale' (un solo processo)
+# oppure 'catalogo.eventi.DiffusorePostgres' (più worker, tramite NOTIFY/LISTEN di PostgreSQL)
+VETRINA_EVENTI_BACKEND = os.environ.get('VETRINA_EVENTI_BACKEND', 'catalogo.eventi.DiffusoreLocale')
+
+# Secondi tra un heartbeat e l'altro sulle connessioni SSE inattive
+VETRINA_EVENTI_HEARTBEAT = 15
+
+
+# ---------------------------------------------
+# PANNELLO ADMIN
+# ---------------------------------------------
+
+# Durata (secondi) della cache dei valori nei filtri laterali e numero massimo di valori mostrati
+ADMIN_FILTRI_CACHE_TIMEOUT = 600
+ADMIN_FILTRI_MAX_VALORI = 50
+
+# Oltre questa soglia, su PostgreSQL, il numero di risultati è stimato dal planner invece che contato
+ADMIN_SOGLIA_CONTEGGIO_STIMATO = 10000
+
+# Numero di maglie aggiornate per ogni query nelle azioni massive
+ADMIN_DIMENSIONE_LOTTO = 1000
+
+
+# ---------------------------------------------
+# AVVIO DEI WORKER
+# ---------------------------------------------
+
+# Budget (ms) per l'avvio dell'applicazione, verificato da "python manage.py tempo_avvio"
+AVVIO_BUDGET_MS = float(os.environ.get('AVVIO_BUDGET_MS', 3000))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -160,11 +225,44 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static'),
 ]
 
-# Forza WhiteNoise a ignorare Cloudinary
-STATICFILES_STORAGE = 'whitenoise.storage.StaticFilesStorage'
+MEDIA_URL = '/media/'
+# Prima MEDIA_ROOT non era impostata e valeva '' (la cartella di lavoro del processo, cioè la
+# root del progetto con gunicorn): le foto già caricate stanno in <root del progetto>/maglie_foto/.
+# Ora la cartella è media/, che si può servire sotto MEDIA_URL senza esporre il resto del progetto.
+# Migrazione, una volta sola, prima di avviare la nuova versione:
+#     mkdir -p media && mv maglie_foto media/
+# Altrimenti foto.url/foto.path non le trovano e né i segnali né pulisci_media le ripuliscono.
+# In alternativa la variabile MEDIA_ROOT indica un'altra cartella (es. quella di sempre).
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+
+# Media - MEDIA_STORAGE sceglie lo storage delle foto:
+# - non impostata: disco locale (FileSystemStorage), cioè ciò che Django usava già di fatto,
+#   dato che DEFAULT_FILE_STORAGE è ignorato da Django 5.1 in poi;
+# - 'cloudinary': Cloudinary. Attenzione: le righe esistenti ('maglie_foto/...') puntano a file
+#   sul disco locale, non su Cloudinary; vanno caricate prima di attivarlo, altrimenti i loro
+#   URL non funzionano (e i segnali/pulisci_media agiscono da quel momento sugli asset Cloudinary);
+# - 'locale': sostituto locale di Cloudinary (catalogo/storage.py), con latenza, banda e
+#   probabilità di errore configurabili.
+MEDIA_STORAGE = os.environ.get('MEDIA_STORAGE')
+if MEDIA_STORAGE == 'cloudinary':
+    STORAGE_MEDIA = {'BACKEND': 'cloudinary_storage.storage.MediaCloudinaryStorage'}
+elif MEDIA_STORAGE == 'locale':
+    STORAGE_MEDIA = {
+        'BACKEND': 'catalogo.storage.CloudinaryLocaleStorage',
+        'OPTIONS': {
+            'latenza_ms': os.environ.get('MEDIA_LATENZA_MS', 0),
+            'banda_kbps': os.environ.get('MEDIA_BANDA_KBPS', 0),
+            'probabilita_errore': os.environ.get('MEDIA_PROBABILITA_ERRORE', 0),
+        },
+    }
+else:
+    STORAGE_MEDIA = {'BACKEND': 'django.core.files.storage.FileSystemStorage'}
 
-# Media - Lasciali pure così, Cloudinary li gestirà correttamente
-DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+STORAGES = {
+    'default': STORAGE_MEDIA,
+    # Forza WhiteNoise a ignorare Cloudinary
+    'staticfiles': {'BACKEND': 'whitenoise.storage.StaticFilesStorage'},
+}
 CLOUDINARY_STORAGE_STATICFILES = False
 
 # URL dove reindirizzare l'utente dopo il login
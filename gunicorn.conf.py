@@ -0,0 +1,11 @@
+# gunicorn.conf.py
+# Letto automaticamente da gunicorn quando viene avviato dalla root del progetto.
+
+
+def post_worker_init(worker):
+    # L'app Django è già caricata: riscaldiamo il worker prima che accetti richieste
+    from catalogo.warmup import riscalda_worker
+
+    durate = riscalda_worker()
+    dettaglio = ', '.join(f"{fase} {ms:.0f} ms" for fase, ms in durate.items())
+    worker.log.info("Worker %s riscaldato in %.0f ms (%s)", worker.pid, sum(durate.values()), dettaglio)
@@ -0,0 +1,98 @@
+// Aggiornamenti live della vetrina tramite Server-Sent Events
+document.addEventListener('DOMContentLoaded', function() {
+    const grid = document.querySelector('.gallery-grid[data-eventi-url]');
+
+    if (!grid || !window.EventSource) {
+        return;
+    }
+
+    const perPagina = parseInt(grid.dataset.perPagina, 10) || 9;
+    const eventi = new EventSource(grid.dataset.eventiUrl);
+
+    // Crea un elemento con classe e testo (textContent evita problemi di escaping)
+    function elemento(tag, classe, testo) {
+        const el = document.createElement(tag);
+        if (classe) {
+            el.className = classe;
+        }
+        if (testo !== undefined) {
+            el.textContent = testo;
+        }
+        return el;
+    }
+
+    // Stessa struttura delle card generate da vetrina_pubblica.html
+    function creaCard(maglia) {
+        const card = elemento('article', 'jersey-showcase-card');
+        card.dataset.magliaId = maglia.id;
+        card.dataset.creazione = maglia.data_creazione;
+
+        const wrapper = elemento('div', 'jersey-image-wrapper');
+        if (maglia.foto) {
+            const img = elemento('img', 'jersey-image');
+            img.src = maglia.foto;
+            img.alt = maglia.giocatore;
+            wrapper.appendChild(img);
+        } else {
+            wrapper.appendChild(elemento('div', 'no-image-placeholder', '👕'));
+        }
+        card.appendChild(wrapper);
+
+        const info = elemento('div', 'jersey-info');
+        info.appendChild(elemento('div', 'jersey-team', maglia.squadra));
+        info.appendChild(elemento('h3', 'jersey-player', maglia.giocatore));
+        info.appendChild(elemento('p', 'jersey-season', 'Stagione ' + maglia.anno_stagione));
+
+        const owner = elemento('div', 'jersey-owner');
+        owner.appendChild(elemento('span', null, '👤'));
+        owner.appendChild(elemento('span', null, maglia.utente));
+        info.appendChild(owner);
+
+        const cta = elemento('div', 'jersey-cta');
+        const link = elemento('a', null, 'Visualizza Dettagli →');
+        link.href = maglia.url;
+        cta.appendChild(link);
+        info.appendChild(cta);
+
+        card.appendChild(info);
+        return card;
+    }
+
+    eventi.addEventListener('maglia_pubblicata', function(e) {
+        const maglia = JSON.parse(e.data);
+        if (grid.querySelector('[data-maglia-id="' + maglia.id + '"]')) {
+            return;
+        }
+
+        // La griglia è ordinata per data di creazione decrescente: una maglia vecchia
+        // tornata pubblica va al suo posto, o su un'altra pagina se è più vecchia dell'ultima
+        const creazione = Date.parse(maglia.data_creazione);
+        const cards = Array.from(grid.querySelectorAll('[data-maglia-id]'));
+        const successiva = cards.find(function(card) {
+            return Date.parse(card.dataset.creazione) < creazione;
+        });
+        if (!successiva && cards.length >= perPagina) {
+            return;
+        }
+
+        const vuoto = grid.querySelector('[data-empty-state]');
+        if (vuoto) {
+            vuoto.remove();
+        }
+
+        grid.insertBefore(creaCard(maglia), successiva || null);
+
+        // La prima pagina resta di "perPagina" maglie: l'ultima scivola alla pagina successiva
+        if (cards.length + 1 > perPagina) {
+            cards[cards.length - 1].remove();
+        }
+    });
+
+    eventi.addEventListener('maglia_nascosta', function(e) {
+        const maglia = JSON.parse(e.data);
+        const card = grid.querySelector('[data-maglia-id="' + maglia.id + '"]');
+        if (card) {
+            card.remove();
+        }
+    });
+});